@@ -1,5 +1,10 @@
+import os
+import glob
+import tempfile
+from datetime import date
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from stock_data import IndianStockDataFetcher
@@ -20,16 +25,71 @@ if 'analyzed_data' not in st.session_state:
     st.session_state.analyzed_data = None
 
 # Initialize classes
-@st.cache_data
+@st.cache_resource
 def get_stock_fetcher():
     return IndianStockDataFetcher()
 
-@st.cache_data
+@st.cache_resource
 def get_analyzer():
     return StockAnalyzer()
 
+# Hash DataFrame arguments of cached helpers by their row hashes
+DATAFRAME_HASH_FUNCS = {pd.DataFrame: lambda d: pd.util.hash_pandas_object(d, index=True).values.tobytes()}
+
+@st.cache_data(hash_funcs=DATAFRAME_HASH_FUNCS)
+def get_sector_analysis(filtered_df):
+    """Sector aggregation, recomputed only when the filtered data changes"""
+    return get_analyzer().get_sector_analysis(filtered_df)
+
+@st.cache_data(hash_funcs=DATAFRAME_HASH_FUNCS)
+def sort_stocks(filtered_df, sort_by, ascending):
+    """Sort by a numeric column, keeping NaNs last and ties in their original order"""
+    values = filtered_df[sort_by].to_numpy(dtype=np.float64, na_value=np.nan)
+    idx = np.argsort(values if ascending else -values, kind='stable')
+    return filtered_df.iloc[idx]
+
+CACHE_DIR = "cache"
+MAX_STOCKS = 20
+# Share of requested stocks a fetch must return before it is cached for the day
+MIN_CACHE_COVERAGE = 0.9
+MAX_SCATTER_POINTS = 500
+
+def get_cache_path():
+    """Path of today's on-disk cache of analyzed stock data"""
+    return os.path.join(CACHE_DIR, f"nifty_{date.today().isoformat()}.parquet")
+
+def write_stock_data_cache(analyzed_df, cache_path):
+    """Atomically write today's cache file and remove those from earlier days"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    # Write to a unique temp file and rename it into place, so concurrent
+    # sessions never see a half-written cache
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.parquet.tmp')
+    os.close(fd)
+    try:
+        analyzed_df.to_parquet(tmp_path, engine='pyarrow', compression='zstd')
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+    for old_path in glob.glob(os.path.join(CACHE_DIR, "nifty_*.parquet")):
+        if old_path != cache_path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
 def load_stock_data():
     """Load stock data with caching"""
+    cache_path = get_cache_path()
+    if os.path.exists(cache_path):
+        try:
+            return pd.read_parquet(cache_path, engine='pyarrow')
+        except Exception as e:
+            # Fall through to a fresh fetch, which rewrites the cache
+            print(f"Error reading stock data cache: {e}")
+
     fetcher = get_stock_fetcher()
     analyzer = get_analyzer()
 
@@ -39,15 +99,157 @@ def load_stock_data():
         symbols = [stock['symbol'] for stock in stock_list]
 
         # Fetch detailed data
-        df = fetcher.get_multiple_stocks_data(symbols, max_stocks=20)
+        df = fetcher.get_multiple_stocks_data(symbols, max_stocks=MAX_STOCKS)
 
         if not df.empty:
             # Analyze stocks
             analyzed_df = analyzer.calculate_overall_score(df)
+
+            # Persist to disk so a server restart doesn't re-fetch everything,
+            # unless so many stocks failed that the fetch shouldn't stand in for the whole day
+            requested = min(len(symbols), MAX_STOCKS)
+            if len(analyzed_df) < requested:
+                print(f"Fetched {len(analyzed_df)}/{requested} stocks")
+            if len(analyzed_df) < requested * MIN_CACHE_COVERAGE:
+                print("Not caching partial stock data")
+            else:
+                try:
+                    write_stock_data_cache(analyzed_df, cache_path)
+                except Exception as e:
+                    print(f"Error writing stock data cache: {e}")
+
             return analyzed_df
         else:
             return pd.DataFrame()
 
+# Each tab is a fragment, so a widget inside one tab reruns only that tab
+@st.fragment
+def render_top_recommendations(filtered_df):
+    """Top recommendations tab"""
+    st.subheader("🏆 Top Stock Recommendations")
+
+    # Top stocks by overall score
+    top_stocks = filtered_df.nlargest(10, 'overall_score')
+
+    if not top_stocks.empty:
+        for idx, stock in top_stocks.iterrows():
+            with st.container():
+                col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 1])
+
+                with col1:
+                    st.markdown(f"**{stock['symbol']}**")
+                    st.caption(stock['companyName'][:30] + "...")
+
+                with col2:
+                    st.metric("Score", f"{stock['overall_score']:.1f}/10")
+
+                with col3:
+                    st.metric("Price", f"₹{stock['currentPrice']:.1f}")
+
+                with col4:
+                    st.metric("PE", f"{stock['pe_ratio']:.1f}")
+
+                with col5:
+                    momentum_color = "normal" if stock['momentum_30d'] >= 0 else "inverse"
+                    st.metric("Momentum", f"{stock['momentum_30d']:.1f}%", delta=None)
+
+                st.divider()
+    else:
+        st.info("No stocks match the current filters.")
+
+@st.fragment
+def render_detailed_analysis(filtered_df):
+    """Detailed analysis tab"""
+    st.subheader("📊 Detailed Stock Analysis")
+
+    # Display options
+    col1, col2 = st.columns(2)
+    with col1:
+        sort_by = st.selectbox(
+            "Sort by",
+            ["overall_score", "pe_ratio", "momentum_30d", "volume", "currentPrice"]
+        )
+    with col2:
+        ascending = st.checkbox("Ascending order", value=False)
+
+    # Display filtered data
+    display_df = sort_stocks(filtered_df, sort_by, ascending)
+
+    # Select columns to display
+    columns_to_show = [
+        'symbol', 'companyName', 'currentPrice', 'pe_ratio',
+        'momentum_30d', 'volume', 'overall_score', 'sector'
+    ]
+
+    st.dataframe(
+        display_df[columns_to_show],
+        use_container_width=True,
+        height=400
+    )
+
+@st.fragment
+def render_sector_analysis(filtered_df):
+    """Sector analysis tab"""
+    st.subheader("🎯 Sector-wise Analysis")
+
+    sector_analysis = get_sector_analysis(filtered_df)
+
+    if not sector_analysis.empty:
+        st.dataframe(sector_analysis, use_container_width=True)
+
+        # Sector performance chart
+        fig = px.bar(
+            sector_analysis.reset_index(),
+            x='sector',
+            y='avg_score',
+            title="Average Score by Sector",
+            color='avg_score',
+            color_continuous_scale='RdYlGn'
+        )
+        fig.update_layout(xaxis_tickangle=-45)
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info("No sector data available.")
+
+@st.fragment
+def render_charts(filtered_df):
+    """Charts tab"""
+    st.subheader("📈 Stock Analysis Charts")
+
+    if len(filtered_df) > 0:
+        # PE vs Momentum scatter plot, capped to the best-scoring stocks
+        scatter_df = filtered_df.nlargest(MAX_SCATTER_POINTS, 'overall_score')
+        fig1 = px.scatter(
+            scatter_df,
+            x='pe_ratio',
+            y='momentum_30d',
+            size='volume',
+            color='overall_score',
+            hover_data=['symbol', 'currentPrice'],
+            title="PE Ratio vs Momentum (Size = Volume, Color = Overall Score)",
+            color_continuous_scale='RdYlGn'
+        )
+        fig1.update_layout(uirevision='constant')
+        st.plotly_chart(fig1, use_container_width=True)
+
+        # Score distribution, binned here rather than in the browser
+        counts, edges = np.histogram(filtered_df['overall_score'].to_numpy(), bins=20)
+        fig2 = go.Figure(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=counts,
+            width=np.diff(edges)
+        ))
+        fig2.update_layout(
+            title="Distribution of Overall Scores",
+            xaxis_title='overall_score',
+            yaxis_title='count',
+            bargap=0,
+            uirevision='constant'
+        )
+        st.plotly_chart(fig2, use_container_width=True)
+    else:
+        st.info("No data to display charts.")
+
 def main():
     st.title("🇮🇳 Indian Stock Analyzer")
     st.markdown("Find the best Indian stocks based on PE ratio, volume, momentum, and profitability")
@@ -60,6 +262,8 @@ def main():
         st.session_state.stock_data = None
         st.session_state.analyzed_data = None
         st.cache_data.clear()
+        if os.path.exists(get_cache_path()):
+            os.remove(get_cache_path())
 
     # Load data if not already loaded
     if st.session_state.analyzed_data is None:
@@ -98,12 +302,16 @@ def main():
     )
 
     # Apply filters
-    filtered_df = df[
-        (df['pe_ratio'] >= pe_range[0]) &
-        (df['pe_ratio'] <= pe_range[1]) &
-        (df['momentum_30d'] >= momentum_min) &
-        (df['volume'] >= volume_min)
-    ]
+    pe = df['pe_ratio'].to_numpy(dtype=np.float64, na_value=np.nan)
+    momentum = df['momentum_30d'].to_numpy(dtype=np.float64, na_value=np.nan)
+    volume = df['volume'].to_numpy(dtype=np.float64, na_value=np.nan)
+    mask = np.logical_and.reduce([
+        pe >= pe_range[0],
+        pe <= pe_range[1],
+        momentum >= momentum_min,
+        volume >= volume_min
+    ])
+    filtered_df = df.iloc[np.flatnonzero(mask)]
 
     # Main content
     col1, col2, col3, col4 = st.columns(4)
@@ -121,115 +329,16 @@ def main():
     tab1, tab2, tab3, tab4 = st.tabs(["🏆 Top Recommendations", "📊 Detailed Analysis", "🎯 Sector Analysis", "📈 Charts"])
 
     with tab1:
-        st.subheader("🏆 Top Stock Recommendations")
-
-        # Top stocks by overall score
-        top_stocks = filtered_df.nlargest(10, 'overall_score')
-
-        if not top_stocks.empty:
-            for idx, stock in top_stocks.iterrows():
-                with st.container():
-                    col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 1])
-
-                    with col1:
-                        st.markdown(f"**{stock['symbol']}**")
-                        st.caption(stock['companyName'][:30] + "...")
-
-                    with col2:
-                        st.metric("Score", f"{stock['overall_score']:.1f}/10")
-
-                    with col3:
-                        st.metric("Price", f"₹{stock['currentPrice']:.1f}")
-
-                    with col4:
-                        st.metric("PE", f"{stock['pe_ratio']:.1f}")
-
-                    with col5:
-                        momentum_color = "normal" if stock['momentum_30d'] >= 0 else "inverse"
-                        st.metric("Momentum", f"{stock['momentum_30d']:.1f}%", delta=None)
-
-                    st.divider()
-        else:
-            st.info("No stocks match the current filters.")
+        render_top_recommendations(filtered_df)
 
     with tab2:
-        st.subheader("📊 Detailed Stock Analysis")
-
-        # Display options
-        col1, col2 = st.columns(2)
-        with col1:
-            sort_by = st.selectbox(
-                "Sort by",
-                ["overall_score", "pe_ratio", "momentum_30d", "volume", "currentPrice"]
-            )
-        with col2:
-            ascending = st.checkbox("Ascending order", value=False)
-
-        # Display filtered data
-        display_df = filtered_df.sort_values(sort_by, ascending=ascending)
-
-        # Select columns to display
-        columns_to_show = [
-            'symbol', 'companyName', 'currentPrice', 'pe_ratio',
-            'momentum_30d', 'volume', 'overall_score', 'sector'
-        ]
-
-        st.dataframe(
-            display_df[columns_to_show],
-            use_container_width=True,
-            height=400
-        )
+        render_detailed_analysis(filtered_df)
 
     with tab3:
-        st.subheader("🎯 Sector-wise Analysis")
-
-        analyzer = get_analyzer()
-        sector_analysis = analyzer.get_sector_analysis(filtered_df)
-
-        if not sector_analysis.empty:
-            st.dataframe(sector_analysis, use_container_width=True)
-
-            # Sector performance chart
-            fig = px.bar(
-                sector_analysis.reset_index(),
-                x='sector',
-                y='avg_score',
-                title="Average Score by Sector",
-                color='avg_score',
-                color_continuous_scale='RdYlGn'
-            )
-            fig.update_layout(xaxis_tickangle=-45)
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("No sector data available.")
+        render_sector_analysis(filtered_df)
 
     with tab4:
-        st.subheader("📈 Stock Analysis Charts")
-
-        if len(filtered_df) > 0:
-            # PE vs Momentum scatter plot
-            fig1 = px.scatter(
-                filtered_df,
-                x='pe_ratio',
-                y='momentum_30d',
-                size='volume',
-                color='overall_score',
-                hover_data=['symbol', 'currentPrice'],
-                title="PE Ratio vs Momentum (Size = Volume, Color = Overall Score)",
-                color_continuous_scale='RdYlGn'
-            )
-            st.plotly_chart(fig1, use_container_width=True)
-
-            # Score distribution
-            fig2 = px.histogram(
-                filtered_df,
-                x='overall_score',
-                title="Distribution of Overall Scores",
-                nbins=20
-            )
-            st.plotly_chart(fig2, use_container_width=True)
-        else:
-            st.info("No data to display charts.")
+        render_charts(filtered_df)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
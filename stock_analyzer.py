@@ -1,34 +1,109 @@
 import pandas as pd
 import numpy as np
+from numba import njit, prange
 from typing import Dict, List, Tuple
 
+# Row count above which the scoring kernel is run across threads
+PARALLEL_SCORING_MIN_ROWS = 100_000
+
+# Score lookup tables: bin edges and the score for each band (int8 is plenty for 1-10)
+_PE_BINS = np.array([15.0, 25.0, 35.0])
+_PE_SCORES = np.array([10, 8, 5, 2], dtype=np.int8)
+_VOLUME_BINS = np.array([0.2, 0.4, 0.6, 0.8])
+_VOLUME_SCORES = np.array([2, 4, 6, 8, 10], dtype=np.int8)
+_MOMENTUM_BINS = np.array([-10.0, 0.0, 10.0, 20.0])
+_MOMENTUM_SCORES = np.array([2, 4, 6, 8, 10], dtype=np.int8)
+_PROFIT_MARGIN_BINS = np.array([0.0, 5.0, 10.0, 20.0])
+_ROE_BINS = np.array([5.0, 10.0, 15.0, 20.0])
+_PROFIT_SCORES = np.array([1, 2, 3, 4, 5], dtype=np.int8)
+# Scores used where the lookup tables don't apply
+_PE_INVALID_SCORE = 1
+_VOLUME_FLAT_SCORE = 5
+_VOLUME_MISSING_SCORE = 2
+_MOMENTUM_MISSING_SCORE = 5
+
+# Component scores and their weights in the overall score, in matching order
+SCORE_COLUMNS = ['pe_score', 'volume_score', 'momentum_score', 'profit_score']
+_WEIGHTS = np.array([0.25, 0.20, 0.25, 0.30])
+
+
+def _score_rows(pe, volume_pct, flat_volume, momentum, profit_margin, roe, weights):
+    """
+    Weighted overall score for every row in a single pass
+
+    Uses the same lookup tables as calculate_pe_score, calculate_volume_score,
+    calculate_momentum_score and calculate_profit_score; weights are
+    ordered as SCORE_COLUMNS.
+    """
+    n = pe.shape[0]
+    out = np.empty(n)
+    for i in prange(n):
+        p = pe[i]
+        if np.isnan(p) or p <= 0:
+            pe_score = _PE_INVALID_SCORE
+        else:
+            pe_score = _PE_SCORES[np.searchsorted(_PE_BINS, p, side='right')]
+
+        v = volume_pct[i]
+        if flat_volume:
+            volume_score = _VOLUME_FLAT_SCORE
+        elif np.isnan(v):
+            volume_score = _VOLUME_MISSING_SCORE
+        else:
+            # Same bands as np.digitize in calculate_volume_score
+            volume_score = _VOLUME_SCORES[np.searchsorted(_VOLUME_BINS, v, side='right')]
+
+        m = momentum[i]
+        if np.isnan(m):
+            momentum_score = _MOMENTUM_MISSING_SCORE
+        else:
+            momentum_score = _MOMENTUM_SCORES[np.searchsorted(_MOMENTUM_BINS, m, side='left')]
+
+        pm = profit_margin[i]
+        if np.isnan(pm):
+            pm = 0.0
+        if pm < 1:
+            pm *= 100
+        r = roe[i]
+        if np.isnan(r):
+            r = 0.0
+        if r < 1:
+            r *= 100
+        profit_score = (
+            _PROFIT_SCORES[np.searchsorted(_PROFIT_MARGIN_BINS, pm, side='left')] +
+            _PROFIT_SCORES[np.searchsorted(_ROE_BINS, r, side='left')]
+        )
+
+        out[i] = (
+            pe_score * weights[0] +
+            volume_score * weights[1] +
+            momentum_score * weights[2] +
+            profit_score * weights[3]
+        )
+    return out
+
+
+# Numba's disk cache is keyed on the Python function, not the parallel flag,
+# so only one of the two builds may use it
+_score_kernel = njit(cache=True)(_score_rows)
+_score_kernel_parallel = njit(parallel=True)(_score_rows)
+
+
 class StockAnalyzer:
     def __init__(self):
-        self.scoring_weights = {
-            'pe_score': 0.25,
-            'volume_score': 0.20,
-            'momentum_score': 0.25,
-            'profit_score': 0.30
-        }
+        # Ordered as SCORE_COLUMNS
+        self.scoring_weights = _WEIGHTS.copy()
 
     def calculate_pe_score(self, df: pd.DataFrame) -> pd.Series:
         """
         Calculate PE ratio score (lower is better)
         Score: 10 for PE < 15, 8 for PE 15-25, 5 for PE 25-35, 2 for PE > 35
         """
-        pe_scores = []
-        for pe in df['pe_ratio']:
-            if pe <= 0 or pd.isna(pe):
-                pe_scores.append(1)  # Penalty for missing/invalid PE
-            elif pe < 15:
-                pe_scores.append(10)
-            elif pe < 25:
-                pe_scores.append(8)
-            elif pe < 35:
-                pe_scores.append(5)
-            else:
-                pe_scores.append(2)
-        return pd.Series(pe_scores)
+        pe = df['pe_ratio'].to_numpy(dtype=np.float64, na_value=np.nan)
+        # side='right' so a PE exactly on an edge falls into the next band
+        pe_scores = _PE_SCORES[np.searchsorted(_PE_BINS, pe, side='right')]
+        pe_scores = np.where(np.isnan(pe) | (pe <= 0), _PE_INVALID_SCORE, pe_scores)  # Penalty for missing/invalid PE
+        return pd.Series(pe_scores, index=df.index)
 
     def calculate_volume_score(self, df: pd.DataFrame) -> pd.Series:
         """
@@ -36,116 +111,89 @@ class StockAnalyzer:
         Higher volume gets higher score
         """
         if df['volume'].sum() == 0:
-            return pd.Series([5] * len(df))
+            return pd.Series(np.full(len(df), _VOLUME_FLAT_SCORE, dtype=np.int8), index=df.index)
 
-        volume_percentiles = df['volume'].rank(pct=True)
-        volume_scores = []
+        volume_percentiles = df['volume'].rank(pct=True).to_numpy(dtype=np.float64, na_value=np.nan)
 
-        for percentile in volume_percentiles:
-            if percentile >= 0.8:
-                volume_scores.append(10)
-            elif percentile >= 0.6:
-                volume_scores.append(8)
-            elif percentile >= 0.4:
-                volume_scores.append(6)
-            elif percentile >= 0.2:
-                volume_scores.append(4)
-            else:
-                volume_scores.append(2)
+        volume_scores = _VOLUME_SCORES[np.digitize(volume_percentiles, _VOLUME_BINS)]
+        # Unranked (missing) volumes get the lowest score
+        volume_scores = np.where(np.isnan(volume_percentiles), _VOLUME_MISSING_SCORE, volume_scores)
 
-        return pd.Series(volume_scores)
+        return pd.Series(volume_scores, index=df.index)
 
     def calculate_momentum_score(self, df: pd.DataFrame) -> pd.Series:
         """
         Calculate momentum score based on 30-day price change
         Positive momentum gets higher score
         """
-        momentum_scores = []
-        for momentum in df['momentum_30d']:
-            if pd.isna(momentum):
-                momentum_scores.append(5)
-            elif momentum > 20:
-                momentum_scores.append(10)
-            elif momentum > 10:
-                momentum_scores.append(8)
-            elif momentum > 0:
-                momentum_scores.append(6)
-            elif momentum > -10:
-                momentum_scores.append(4)
-            else:
-                momentum_scores.append(2)
-        return pd.Series(momentum_scores)
+        momentum = df['momentum_30d'].to_numpy(dtype=np.float64, na_value=np.nan)
+        nan_mask = np.isnan(momentum)
+
+        # side='left' so a value exactly on an edge stays in the lower band
+        momentum_scores = _MOMENTUM_SCORES[np.searchsorted(_MOMENTUM_BINS, np.where(nan_mask, 0.0, momentum), side='left')]
+        momentum_scores = np.where(nan_mask, _MOMENTUM_MISSING_SCORE, momentum_scores)
+        return pd.Series(momentum_scores, index=df.index)
 
     def calculate_profit_score(self, df: pd.DataFrame) -> pd.Series:
         """
         Calculate profitability score based on profit margin and ROE
         """
-        profit_scores = []
+        def metric_pct(column: str) -> np.ndarray:
+            # Handle missing values
+            values = self._column_values(df, column)
+            values = np.where(np.isnan(values), 0.0, values)
+            # Convert to percentage if needed
+            return np.where(values < 1, values * 100, values)
 
-        for idx, row in df.iterrows():
-            profit_margin = row.get('profit_margin', 0)
-            roe = row.get('roe', 0)
+        # Combined score based on both metrics; side='left' keeps the strict '>' edges
+        profit_margin_score = _PROFIT_SCORES[np.searchsorted(_PROFIT_MARGIN_BINS, metric_pct('profit_margin'), side='left')]
+        roe_score = _PROFIT_SCORES[np.searchsorted(_ROE_BINS, metric_pct('roe'), side='left')]
 
-            # Handle missing values
-            if pd.isna(profit_margin):
-                profit_margin = 0
-            if pd.isna(roe):
-                roe = 0
+        return pd.Series(profit_margin_score + roe_score, index=df.index)
 
-            # Convert to percentage if needed
-            if profit_margin < 1:
-                profit_margin *= 100
-            if roe < 1:
-                roe *= 100
-
-            # Combined score based on both metrics
-            score = 0
-
-            # Profit margin scoring
-            if profit_margin > 20:
-                score += 5
-            elif profit_margin > 10:
-                score += 4
-            elif profit_margin > 5:
-                score += 3
-            elif profit_margin > 0:
-                score += 2
-            else:
-                score += 1
-
-            # ROE scoring
-            if roe > 20:
-                score += 5
-            elif roe > 15:
-                score += 4
-            elif roe > 10:
-                score += 3
-            elif roe > 5:
-                score += 2
-            else:
-                score += 1
-
-            profit_scores.append(score)
-
-        return pd.Series(profit_scores)
-
-    def calculate_overall_score(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _column_values(self, df: pd.DataFrame, column: str) -> np.ndarray:
         """
-        Calculate overall investment score for each stock
+        Column as a float64 array with NaN for missing values (all zeros if the column is absent)
         """
-        # Calculate individual scores
-        df['pe_score'] = self.calculate_pe_score(df)
-        df['volume_score'] = self.calculate_volume_score(df)
-        df['momentum_score'] = self.calculate_momentum_score(df)
-        df['profit_score'] = self.calculate_profit_score(df)
+        if column not in df.columns:
+            return np.zeros(len(df))
+        return df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def calculate_overall_score(self, df: pd.DataFrame, include_component_scores: bool = False) -> pd.DataFrame:
+        """
+        Calculate overall investment score for each stock
+
+        The individual scores are only written back to the dataframe
+        (as pe_score, volume_score, ...) when include_component_scores is set;
+        otherwise the score is computed in one pass by the compiled kernel.
+        """
+        if not include_component_scores:
+            kernel = _score_kernel_parallel if len(df) >= PARALLEL_SCORING_MIN_ROWS else _score_kernel
+            overall_score = kernel(
+                self._column_values(df, 'pe_ratio'),
+                df['volume'].rank(pct=True).to_numpy(dtype=np.float64, na_value=np.nan),
+                bool(df['volume'].sum() == 0),
+                self._column_values(df, 'momentum_30d'),
+                self._column_values(df, 'profit_margin'),
+                self._column_values(df, 'roe'),
+                self.scoring_weights
+            )
+            df['overall_score'] = np.round(overall_score, 2)
+            return df
+
+        # Calculate individual scores, one column per SCORE_COLUMNS entry
+        component_scores = np.column_stack([
+            self.calculate_pe_score(df).to_numpy(),
+            self.calculate_volume_score(df).to_numpy(),
+            self.calculate_momentum_score(df).to_numpy(),
+            self.calculate_profit_score(df).to_numpy()
+        ])
+
+        for i, name in enumerate(SCORE_COLUMNS):
+            df[name] = component_scores[:, i]
 
         # Calculate weighted overall score
-        df['overall_score'] = (
-            df['pe_score'] * self.scoring_weights['pe_score'] +
-            df['volume_score'] * self.scoring_weights['volume_score'] +
-            df['momentum_score'] * self.scoring_weights['momentum_score'] +
-            df['profit_score'] * self.scoring_weights['profit_score']
-        ).round(2)
+        df['overall_score'] = np.round(component_scores @ self.scoring_weights, 2)
 
         return df
 
@@ -169,28 +217,33 @@ class StockAnalyzer:
             'min_momentum': 0,
             'min_profit_margin': 5
         }
+
+        The input is never copied; callers that want to modify the result
+        should take a .copy() of it first.
         """
-        filtered_df = df.copy()
+        mask = np.ones(len(df), dtype=bool)
 
-        if 'min_pe' in criteria:
-            filtered_df = filtered_df[filtered_df['pe_ratio'] >= criteria['min_pe']]
-        if 'max_pe' in criteria:
-            filtered_df = filtered_df[filtered_df['pe_ratio'] <= criteria['max_pe']]
+        if 'min_pe' in criteria or 'max_pe' in criteria:
+            pe = df['pe_ratio'].to_numpy(dtype=np.float64, na_value=np.nan)
+            if 'min_pe' in criteria:
+                mask &= pe >= criteria['min_pe']
+            if 'max_pe' in criteria:
+                mask &= pe <= criteria['max_pe']
         if 'min_momentum' in criteria:
-            filtered_df = filtered_df[filtered_df['momentum_30d'] >= criteria['min_momentum']]
+            mask &= df['momentum_30d'].to_numpy(dtype=np.float64, na_value=np.nan) >= criteria['min_momentum']
         if 'min_profit_margin' in criteria:
-            profit_margin_pct = filtered_df['profit_margin'] * 100
-            filtered_df = filtered_df[profit_margin_pct >= criteria['min_profit_margin']]
+            profit_margin_pct = df['profit_margin'].to_numpy(dtype=np.float64, na_value=np.nan) * 100
+            mask &= profit_margin_pct >= criteria['min_profit_margin']
         if 'min_volume' in criteria:
-            filtered_df = filtered_df[filtered_df['volume'] >= criteria['min_volume']]
+            mask &= df['volume'].to_numpy(dtype=np.float64, na_value=np.nan) >= criteria['min_volume']
 
-        return filtered_df
+        return df.iloc[np.flatnonzero(mask)]
 
     def get_sector_analysis(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Analyze stocks by sector
         """
-        sector_analysis = df.groupby('sector').agg({
+        sector_analysis = df.groupby('sector', observed=True).agg({
             'overall_score': ['mean', 'count'],
             'pe_ratio': 'mean',
             'momentum_30d': 'mean',
@@ -1,27 +1,55 @@
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
+from tenacity import retry, stop_after_attempt, wait_exponential
 from typing import Dict, List, Optional
-import time
+
+# Columns of the frame returned by get_multiple_stocks_data, in order
+STOCK_COLUMNS = [
+    'symbol', 'companyName', 'currentPrice', 'volume', 'marketCap', 'pe_ratio',
+    'pb_ratio', 'roe', 'profit_margin', 'momentum_30d', 'sector', 'industry'
+]
+# Text columns, stored as Arrow-backed strings instead of object dtype
+STRING_COLUMNS = {'symbol', 'companyName', 'sector', 'industry'}
+
+# Retry transient Yahoo Finance failures with a short exponential backoff
+_yf_retry = retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.5, max=4), reraise=True)
 
 class IndianStockDataFetcher:
     def __init__(self):
         self.base_url = "https://latest-stock-price.p.rapidapi.com"
         self.nse_url = "https://www.nseindia.com/api"
 
+        # Reuse pooled connections (and their TLS sessions) across requests
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        })
+        self.session.mount('https://', HTTPAdapter(
+            max_retries=Retry(total=3, backoff_factor=0.5),
+            pool_connections=10,
+            pool_maxsize=10
+        ))
+
     def get_nse_stocks(self) -> List[Dict]:
         """Fetch NSE stock data using free endpoints"""
         try:
             # NSE equity list
             url = "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%2050"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
 
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.session.get(url, timeout=10)
             if response.status_code == 200:
                 data = response.json()
-                return data.get('data', [])
+                # The index itself (symbol 'NIFTY 50') is listed alongside its
+                # constituents but has no trading series and no Yahoo ticker
+                stocks = [
+                    stock for stock in data.get('data', [])
+                    if stock.get('series') and stock.get('symbol') != data.get('name')
+                ]
+                return stocks or self.get_fallback_nifty50_stocks()
             else:
                 return self.get_fallback_nifty50_stocks()
 
@@ -46,6 +74,83 @@ class IndianStockDataFetcher:
 
         return [{'symbol': symbol} for symbol in nifty50_symbols]
 
+    @_yf_retry
+    def _fetch_info(self, yf_symbol: str) -> Dict:
+        """Fetch the Yahoo Finance info dict for a single ticker"""
+        return yf.Ticker(yf_symbol).info
+
+    @_yf_retry
+    def _fetch_history(self, yf_symbol: str) -> pd.DataFrame:
+        """Fetch 1 month of price/volume history for a single ticker"""
+        hist = yf.Ticker(yf_symbol).history(period="1mo", auto_adjust=True, actions=False)
+        # yfinance logs fetch errors and returns an empty frame, so raise to trigger a retry
+        if hist.empty:
+            raise ValueError(f"No price history returned for {yf_symbol}")
+        return hist
+
+    def _fetch_history_batch(self, yf_symbols: List[str]) -> pd.DataFrame:
+        """
+        Fetch 1 month of price/volume history for all tickers in one request
+
+        yf.download swallows per-ticker errors and leaves those tickers
+        missing or all-NaN; see _history_from_batch for the refetch.
+        """
+        return yf.download(
+            tickers=" ".join(yf_symbols),
+            period="1mo",
+            auto_adjust=True,
+            actions=False,
+            group_by='ticker',
+            threads=True,
+            progress=False
+        )
+
+    def _history_from_batch(self, history: pd.DataFrame, yf_symbol: str) -> pd.DataFrame:
+        """Pick one ticker out of a batched download, refetching it on its own if the batch has no data for it"""
+        hist = pd.DataFrame()
+        if isinstance(history.columns, pd.MultiIndex):
+            if yf_symbol in history.columns.get_level_values(0):
+                hist = history[yf_symbol]
+        elif not history.empty:
+            # Single-ticker downloads may come back without the ticker level
+            hist = history
+
+        # The batched frame is aligned on a shared date index
+        hist = hist.dropna(how='all')
+        if hist.empty:
+            hist = self._fetch_history(yf_symbol)
+        return hist
+
+    def _build_stock_details(self, symbol: str, info: Dict, hist: pd.DataFrame) -> Optional[Dict]:
+        """Combine ticker info and price history into a single stock record"""
+        if hist.empty:
+            return None
+
+        close = hist['Close'].to_numpy()
+        latest_price = close[-1]
+        volume = hist['Volume'].to_numpy()[-1]
+
+        # Calculate momentum (30-day price change)
+        if close.size > 1:
+            momentum = ((latest_price - close[0]) / close[0]) * 100
+        else:
+            momentum = 0
+
+        return {
+            'symbol': symbol,
+            'companyName': info.get('longName', symbol),
+            'currentPrice': round(latest_price, 2),
+            'volume': int(volume),
+            'marketCap': info.get('marketCap', 0),
+            'pe_ratio': info.get('trailingPE', 0),
+            'pb_ratio': info.get('priceToBook', 0),
+            'roe': info.get('returnOnEquity', 0),
+            'profit_margin': info.get('profitMargins', 0),
+            'momentum_30d': round(momentum, 2),
+            'sector': info.get('sector', 'Unknown'),
+            'industry': info.get('industry', 'Unknown')
+        }
+
     def get_stock_details_yfinance(self, symbol: str) -> Optional[Dict]:
         """Get detailed stock information using yfinance"""
         try:
@@ -55,51 +160,55 @@ class IndianStockDataFetcher:
 
             # Get stock info
             info = stock.info
-            hist = stock.history(period="1mo")
-
-            if hist.empty:
-                return None
+            hist = stock.history(period="1mo", auto_adjust=True, actions=False)
 
-            latest_price = hist['Close'].iloc[-1]
-            volume = hist['Volume'].iloc[-1]
-
-            # Calculate momentum (30-day price change)
-            if len(hist) > 1:
-                momentum = ((latest_price - hist['Close'].iloc[0]) / hist['Close'].iloc[0]) * 100
-            else:
-                momentum = 0
-
-            return {
-                'symbol': symbol,
-                'companyName': info.get('longName', symbol),
-                'currentPrice': round(latest_price, 2),
-                'volume': int(volume),
-                'marketCap': info.get('marketCap', 0),
-                'pe_ratio': info.get('trailingPE', 0),
-                'pb_ratio': info.get('priceToBook', 0),
-                'roe': info.get('returnOnEquity', 0),
-                'profit_margin': info.get('profitMargins', 0),
-                'momentum_30d': round(momentum, 2),
-                'sector': info.get('sector', 'Unknown'),
-                'industry': info.get('industry', 'Unknown')
-            }
+            return self._build_stock_details(symbol, info, hist)
 
         except Exception as e:
             print(f"Error fetching data for {symbol}: {e}")
             return None
 
     def get_multiple_stocks_data(self, symbols: List[str], max_stocks: int = 20) -> pd.DataFrame:
-        """Fetch data for multiple stocks with rate limiting"""
-        stock_data = []
+        """Fetch data for multiple stocks with one batched history download and threaded per-ticker calls"""
+        symbols = symbols[:max_stocks]
+        if not symbols:
+            return pd.DataFrame()
+
+        # Add .NS suffix for NSE stocks
+        yf_symbols = [f"{symbol}.NS" for symbol in symbols]
+        print(f"Fetching data for {len(symbols)} stocks")
+
+        try:
+            history = self._fetch_history_batch(yf_symbols)
+        except Exception as e:
+            # Every ticker falls back to its own history request
+            print(f"Error fetching price history: {e}")
+            history = pd.DataFrame()
+
+        def fetch_stock(symbol: str, yf_symbol: str) -> Optional[Dict]:
+            # Info and any history refetch for one ticker run in the same worker
+            try:
+                info = self._fetch_info(yf_symbol)
+                hist = self._history_from_batch(history, yf_symbol)
+                return self._build_stock_details(symbol, info, hist)
+            except Exception as e:
+                print(f"Error fetching data for {symbol}: {e}")
+                return None
 
-        for i, symbol in enumerate(symbols[:max_stocks]):
-            print(f"Fetching data for {symbol} ({i+1}/{min(len(symbols), max_stocks)})")
-            data = self.get_stock_details_yfinance(symbol)
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            records = list(executor.map(fetch_stock, symbols, yf_symbols))
 
+        # Accumulate column by column rather than as a list of row dicts
+        stock_data = {column: [] for column in STOCK_COLUMNS}
+        for data in records:
             if data:
-                stock_data.append(data)
+                for column, values in stock_data.items():
+                    values.append(data[column])
 
-            # Rate limiting to avoid being blocked
-            time.sleep(0.5)
+        if not stock_data['symbol']:
+            return pd.DataFrame()
 
-        return pd.DataFrame(stock_data)
\ No newline at end of file
+        return pd.DataFrame({
+            column: pd.array(values, dtype='string[pyarrow]') if column in STRING_COLUMNS else values
+            for column, values in stock_data.items()
+        })
\ No newline at end of file